@@ -2,35 +2,38 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import requests
-import weasyprint
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from vapi_python import Vapi
-import gspread
-from google.oauth2.service_account import Credentials
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 import json
 from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import csv
-import io
 import hashlib
-import threading
+import hmac
+import io
 import time
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import queue
 import uuid
 import os
 import sys
+from collections import deque
+from itertools import islice
+from types import MappingProxyType
 from typing import Dict, List, Optional, Any
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
 # --- SUPPRESS AUDIO ERRORS ---
 # Set environment variables to suppress ALSA errors
-os.environ['ALSA_PCM_CARD'] = '-1'
-os.environ['ALSA_PCM_DEVICE'] = '-1'
-os.environ['SDL_AUDIODRIVER'] = 'dummy'
-os.environ['PULSE_RUNTIME_PATH'] = '/tmp/pulse-dummy'
+_AUDIO_ENV = {
+    'ALSA_PCM_CARD': '-1',
+    'ALSA_PCM_DEVICE': '-1',
+    'SDL_AUDIODRIVER': 'dummy',
+    'PULSE_RUNTIME_PATH': '/tmp/pulse-dummy'
+}
+os.environ.update(_AUDIO_ENV)
 
 # Redirect stderr to suppress ALSA warnings
 import contextlib
@@ -59,61 +62,120 @@ def calculate_analytics_with_numpy(data):
     if not data:
         return {}
     
-    values = np.array([float(item.get('amount', 0)) for item in data])
+    values = np.fromiter((float(item.get('amount', 0)) for item in data),
+                         dtype=np.float64, count=len(data))
+    total = values.sum()
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
     return {
-        'mean': np.mean(values),
+        'mean': total / values.size,
         'std': np.std(values),
-        'median': np.median(values),
-        'total': np.sum(values),
-        'percentile_75': np.percentile(values, 75),
-        'percentile_25': np.percentile(values, 25)
+        'median': median,
+        'total': total,
+        'percentile_75': p75,
+        'percentile_25': p25
     }
 
+@st.cache_resource(show_spinner=False)
+def http_session() -> requests.Session:
+    """Keep-alive HTTP session for external APIs and the N8N webhook, shared across reruns"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=10, pool_maxsize=10,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    ))
+    return session
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_json(url):
+    """GET a JSON document; failures raise so they are never cached"""
+    response = http_session().get(url, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
 def fetch_external_data_with_requests(url=None):
     """Use requests library for external API calls"""
     try:
         if not url:
             url = "https://api.exchangerate-api.com/v4/latest/USD"
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return _fetch_json(url)
     except requests.exceptions.RequestException as e:
         return {"error": str(e)}
 
+def dump_json(data, indent: bool = False) -> bytes:
+    """JSON bytes for downloads and webhooks, using orjson when it is installed"""
+    if orjson is not None:
+        # Datetimes go through default=str, as with json, so both paths write "YYYY-MM-DD HH:MM:SS"
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=str, option=option)
+    return json.dumps(data, indent=2 if indent else None, default=str).encode('utf-8')
+
+def store_export(key: str, build, indent: bool, version):
+    """Button callback: serialize an export payload once and keep the bytes in session state"""
+    st.session_state[key] = (version(), dump_json(build(), indent=indent))
+
+def prepared_export(key: str, version):
+    """Bytes kept by store_export, dropped once the data they were built from has changed"""
+    entry = st.session_state.get(key)
+    if entry is None:
+        return None
+    if entry[0] != version:
+        del st.session_state[key]
+        return None
+    return entry[1]
+
+PDF_REPORT_CSS = """
+body { font-family: Arial, sans-serif; margin: 40px; }
+h1 { color: #2E86AB; }
+.header { border-bottom: 2px solid #2E86AB; padding-bottom: 10px; }
+.content { margin-top: 20px; }
+table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+th { background-color: #f2f2f2; }
+"""
+
+PDF_REPORT_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>CRM Report</title>
+</head>
+<body>
+    <div class="header">
+        <h1>🧼 Lil J’s Ai Auto Laundry</h1>
+        <p>Generated on: {generated_on}</p>
+    </div>
+    <div class="content">
+        {content}
+    </div>
+</body>
+</html>
+"""
+
+@st.cache_resource(show_spinner=False)
+def _pdf_report_stylesheet():
+    """Parse the report stylesheet once per process, not once per rerun"""
+    import weasyprint
+    return weasyprint.CSS(string=PDF_REPORT_CSS)
+
 def generate_pdf_report_with_weasyprint(html_content, filename):
     """Use WeasyPrint to generate PDF reports"""
     try:
-        html_template = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>CRM Report</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                h1 {{ color: #2E86AB; }}
-                .header {{ border-bottom: 2px solid #2E86AB; padding-bottom: 10px; }}
-                .content {{ margin-top: 20px; }}
-                table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🧼 Lil J’s Ai Auto Laundry</h1>
-                <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-            <div class="content">
-                {html_content}
-            </div>
-        </body>
-        </html>
-        """
+        # WeasyPrint pulls in Pango/Cairo, so only load it when a report is requested
+        import weasyprint
+        
+        html_template = PDF_REPORT_TEMPLATE.format(
+            generated_on=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            content=html_content
+        )
         
         pdf_path = f"/tmp/{filename}.pdf"
-        weasyprint.HTML(string=html_template).write_pdf(pdf_path)
+        weasyprint.HTML(string=html_template).write_pdf(
+            pdf_path, stylesheets=[_pdf_report_stylesheet()]
+        )
         return pdf_path
     except Exception as e:
         return f"Error generating PDF: {str(e)}"
@@ -146,6 +208,25 @@ DEMO_ACCOUNTS = {
     "supervisor1": {"password": "super123", "role": "Supervisor", "team": "Quality Control", "name": "Emma Supervisor"},
     "demo": {"password": "demo123", "role": "Demo User", "team": "Demo", "name": "Demo User"}
 }
+DEMO_ACCOUNT_COUNT = len(DEMO_ACCOUNTS)
+
+@st.cache_resource(show_spinner=False)
+def demo_password_digests():
+    """Per-process salt and salted demo password digests, computed once across reruns"""
+    salt = os.urandom(16)
+    digests = MappingProxyType({
+        username: hashlib.sha256(salt + info["password"].encode()).digest()
+        for username, info in DEMO_ACCOUNTS.items()
+    })
+    return salt, digests
+
+@st.cache_resource(show_spinner=False)
+def demo_profiles():
+    """Password-free demo profiles handed to the session, built once per process"""
+    return MappingProxyType({
+        username: MappingProxyType({key: value for key, value in info.items() if key != "password"})
+        for username, info in DEMO_ACCOUNTS.items()
+    })
 
 # --- TEAM STRUCTURE ---
 TEAM_STRUCTURE = {
@@ -181,12 +262,33 @@ TEAM_STRUCTURE = {
     }
 }
 
+TEAM_MEMBER_COUNT = sum(len(team_info["members"]) for team_info in TEAM_STRUCTURE.values())
+
+# --- FORM OPTIONS ---
+CONTACT_PREFERENCES = ("Call", "Text", "Email", "WhatsApp")
+CUSTOMER_SORT_FIELDS = ("Name", "Phone Number", "Email", "Preferred_Time")
+SORT_ORDERS = ("Ascending", "Descending")
+INVOICE_STATUSES = ("Pending", "Paid", "Overdue", "Cancelled")
+PAYMENT_METHODS = ("Cash", "Card", "Bank Transfer", "PayPal")
+CALL_TYPE_OPTIONS = ("Outbound Call", "Server Call Link", "API Call")
+PRIORITY_LEVELS = ("Normal", "High", "Emergency")
+LOG_LEVEL_FILTERS = ("All", "INFO", "ERROR", "WARNING")
+
 # --- HARDCODED CREDENTIALS ---
 DEFAULT_CUSTOMERS_SHEET = "https://docs.google.com/spreadsheets/d/1LZvUQwceVE1dyCjaNod0DPOhHaIGLLBqomCDgxiWuBg/edit?gid=392374958#gid=392374958"
 DEFAULT_N8N_WEBHOOK = "https://agentonline-u29564.vm.elestio.app/webhook/f4927f0d-167b-4ab0-94d2-87d4c373f9e9"
 HARDCODED_INVOICES_SHEET = "https://docs.google.com/spreadsheets/d/1LZvUQwceVE1dyCjaNod0DPOhHaIGLLBqomCDgxiWuBg/edit?gid=1234567890#gid=1234567890"
 PRICE_LIST_SHEET = "https://docs.google.com/spreadsheets/d/1WeDpcSNnfCrtx4F3bBC9osigPkzy3LXybRO6jpN7BXE/edit?usp=drivesdk"
 
+# --- SAMPLE PRICE LIST (USED WHEN THE PRICE SHEET IS UNREACHABLE) ---
+SAMPLE_PRICE_LIST = {
+    "Service Category": ["Washing", "Dry Cleaning", "Pressing", "Alterations", "Special"],
+    "Item": ["Regular Wash", "Suit Cleaning", "Shirt Press", "Hem Adjustment", "Express Service"],
+    "Price (USD)": [15.00, 25.00, 8.00, 12.00, 35.00],
+    "Turnaround Time": ["2 hours", "24 hours", "1 hour", "48 hours", "30 minutes"],
+    "Notes": ["Standard washing service", "Professional dry cleaning", "Professional pressing", "Basic alterations", "Rush service available"]
+}
+
 # --- REAL AI ASSISTANT ID (SINGLE ID FOR ALL ASSISTANTS) ---
 REAL_ASSISTANT_ID = "04b80e02-9615-4c06-9424-93b4b1e2cdc9"
 
@@ -262,12 +364,19 @@ AI_ASSISTANTS = {
 
 # --- ENHANCED AI PHONE SYSTEM MANAGER (AUDIO-FIXED) ---
 class AudioFixedAIPhoneSystem:
+    # Seconds a status snapshot may be reused between state changes
+    STATUS_CACHE_TTL = 1.0
+    # Calls kept in memory; older ones still count towards the analytics
+    CALL_HISTORY_LIMIT = 1000
+    CALL_LOG_LIMIT = 1000
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.client = None
         self.active_calls = {}
-        self.call_history = []
-        self.call_logs = []
+        self.call_history = deque(maxlen=self.CALL_HISTORY_LIMIT)
+        self.calls_by_date = {}
+        self.call_logs = deque(maxlen=self.CALL_LOG_LIMIT)
         self.call_analytics = {
             'total_calls': 0,
             'successful_calls': 0,
@@ -275,10 +384,15 @@ class AudioFixedAIPhoneSystem:
             'outbound_calls': 0,
             'server_calls': 0,
             'average_duration': 0,
+            'success_rate': 100.0,
             'assistant_usage': {}
         }
-        self.thread_pool = ThreadPoolExecutor(max_workers=5)
         self.monitoring_active = False
+        self._duration_sum = 0.0
+        self._duration_count = 0
+        self._status_cache = (0.0, None)
+        # Bumped on every logged state change, so callers can tell when their copy is stale
+        self.state_version = 0
         self.call_queue = queue.Queue()
         
     def initialize_system(self) -> tuple[bool, str]:
@@ -286,7 +400,7 @@ class AudioFixedAIPhoneSystem:
         try:
             with suppress_audio_errors():
                 self.client = Vapi(api_key=self.api_key)
-                self._start_monitoring()
+                self.monitoring_active = True
                 self._log_event("Audio-Fixed AI Phone System initialized successfully")
                 return True, "Audio-Fixed AI Phone System initialized successfully"
         except Exception as e:
@@ -339,19 +453,21 @@ class AudioFixedAIPhoneSystem:
                 'assistant_name': assistant_config['name'],
                 'status': 'active',
                 'start_time': datetime.now(),
+                'start_ns': time.monotonic_ns(),
                 'context': context or {},
                 'user_info': user_info or {},
                 'vapi_response': str(call_response)
             }
             
             self.active_calls[call_id] = call_record
-            self.call_history.append(call_record.copy())
+            self._add_to_history(call_record)
             
             # Update analytics
             self.call_analytics['total_calls'] += 1
             self.call_analytics['outbound_calls'] += 1
             self.call_analytics['assistant_usage'][assistant_type] = \
                 self.call_analytics['assistant_usage'].get(assistant_type, 0) + 1
+            self._refresh_success_rate()
             
             self._log_event(f"Outbound call started: {call_id} to {phone_number} with {assistant_config['name']}")
             
@@ -406,19 +522,21 @@ class AudioFixedAIPhoneSystem:
                 'assistant_name': assistant_config['name'],
                 'status': 'link_created',
                 'start_time': datetime.now(),
+                'start_ns': time.monotonic_ns(),
                 'context': context or {},
                 'user_info': user_info or {},
                 'call_link': call_link,
                 'config': call_config
             }
             
-            self.call_history.append(call_record.copy())
+            self._add_to_history(call_record)
             
             # Update analytics
             self.call_analytics['total_calls'] += 1
             self.call_analytics['server_calls'] += 1
             self.call_analytics['assistant_usage'][assistant_type] = \
                 self.call_analytics['assistant_usage'].get(assistant_type, 0) + 1
+            self._refresh_success_rate()
             
             self._log_event(f"Server call link created: {call_id} with {assistant_config['name']}")
             
@@ -452,18 +570,20 @@ class AudioFixedAIPhoneSystem:
                 'assistant_name': assistant_config['name'],
                 'status': 'api_active',
                 'start_time': datetime.now(),
+                'start_ns': time.monotonic_ns(),
                 'context': context or {},
                 'user_info': user_info or {},
                 'api_endpoint': f"https://api.vapi.ai/assistant/{assistant_config['id']}/chat"
             }
             
             self.active_calls[call_id] = call_record
-            self.call_history.append(call_record.copy())
+            self._add_to_history(call_record)
             
             # Update analytics
             self.call_analytics['total_calls'] += 1
             self.call_analytics['assistant_usage'][assistant_type] = \
                 self.call_analytics['assistant_usage'].get(assistant_type, 0) + 1
+            self._refresh_success_rate()
             
             self._log_event(f"API call started: {call_id} with {assistant_config['name']}")
             
@@ -490,24 +610,30 @@ class AudioFixedAIPhoneSystem:
                 call_record = self.active_calls[call_id]
                 call_record['status'] = 'completed'
                 call_record['end_time'] = datetime.now()
-                call_record['duration'] = (call_record['end_time'] - call_record['start_time']).total_seconds()
+                call_record['duration'] = (time.monotonic_ns() - call_record['start_ns']) / 1e9
                 
                 del self.active_calls[call_id]
-                self._log_event(f"Call stopped: {call_id}")
                 self.call_analytics['successful_calls'] += 1
+                self._refresh_success_rate()
+                self._record_duration(call_record['duration'])
+                self._log_event(f"Call stopped: {call_id}")
                 
                 return True, f"Call {call_id} stopped successfully"
             else:
                 # Stop all active calls
                 stopped_calls = len(self.active_calls)
+                end_time = datetime.now()
+                end_ns = time.monotonic_ns()
                 
                 for cid, call_record in self.active_calls.items():
                     call_record['status'] = 'stopped'
-                    call_record['end_time'] = datetime.now()
-                    call_record['duration'] = (call_record['end_time'] - call_record['start_time']).total_seconds()
+                    call_record['end_time'] = end_time
+                    call_record['duration'] = (end_ns - call_record['start_ns']) / 1e9
                     self.call_analytics['successful_calls'] += 1
+                    self._record_duration(call_record['duration'])
                 
                 self.active_calls.clear()
+                self._refresh_success_rate()
                 self._log_event(f"All calls stopped ({stopped_calls} calls)")
                 
                 return True, f"All active calls stopped ({stopped_calls} calls)"
@@ -518,37 +644,49 @@ class AudioFixedAIPhoneSystem:
             return False, error_msg
     
     def get_system_status(self) -> Dict:
-        """Get comprehensive system status"""
-        return {
+        """Get comprehensive system status (cached briefly between state changes)"""
+        now = time.monotonic()
+        cached_at, snapshot = self._status_cache
+        if snapshot is not None and now - cached_at < self.STATUS_CACHE_TTL:
+            return snapshot
+        
+        wall_now = datetime.now()
+        snapshot = {
             'active_calls': len(self.active_calls),
             'active_call_details': list(self.active_calls.values()),
-            'total_calls_today': len([c for c in self.call_history 
-                                    if c['start_time'].date() == datetime.now().date()]),
-            'call_history': self.call_history[-50:],
-            'call_logs': self.call_logs[-100:],
+            'total_calls_today': self.calls_by_date.get(wall_now.date(), 0),
+            'call_history': list(islice(reversed(self.call_history), 50))[::-1],
+            'call_logs': [line for _, line in islice(reversed(self.call_logs), 100)][::-1],
             'analytics': self.call_analytics,
-            'system_health': self._get_system_health(),
-            'assistant_availability': self._get_assistant_availability(),
+            'system_health': self._get_system_health(wall_now),
+            'assistant_availability': self._get_assistant_availability(wall_now),
             'audio_status': 'disabled_for_streamlit_cloud'
         }
+        self._status_cache = (now, snapshot)
+        return snapshot
+    
+    def _add_to_history(self, call_record: Dict):
+        """Record a new call and bump its day's call count"""
+        self.call_history.append(call_record)
+        call_date = call_record['start_time'].date()
+        self.calls_by_date[call_date] = self.calls_by_date.get(call_date, 0) + 1
     
-    def _get_system_health(self) -> Dict:
+    def _get_system_health(self, now: datetime) -> Dict:
         """Get system health metrics"""
-        total_calls = self.call_analytics['total_calls']
-        success_rate = (self.call_analytics['successful_calls'] / total_calls * 100) if total_calls > 0 else 100
+        success_rate = self.call_analytics['success_rate']
         
         return {
             'status': 'healthy' if success_rate > 90 else 'warning' if success_rate > 70 else 'critical',
             'success_rate': success_rate,
             'monitoring_active': self.monitoring_active,
             'audio_errors_suppressed': True,
-            'last_health_check': datetime.now().isoformat()
+            'last_health_check': now.isoformat()
         }
     
-    def _get_assistant_availability(self) -> Dict:
+    def _get_assistant_availability(self, now: datetime) -> Dict:
         """Get assistant availability status"""
         availability = {}
-        current_hour = datetime.now().hour
+        current_hour = now.hour
         
         for assistant_type, config in AI_ASSISTANTS.items():
             if config['availability'] == '24/7':
@@ -562,50 +700,50 @@ class AudioFixedAIPhoneSystem:
         
         return availability
     
-    def _start_monitoring(self):
-        """Start system monitoring"""
-        if not self.monitoring_active:
-            self.monitoring_active = True
-            self.thread_pool.submit(self._continuous_monitoring)
-    
-    def _continuous_monitoring(self):
-        """Continuous system monitoring"""
-        while self.monitoring_active:
-            try:
-                self._update_analytics()
-                time.sleep(10)  # Monitor every 10 seconds
-            except Exception as e:
-                self._log_event(f"Monitoring error: {str(e)}", "ERROR")
+    def _refresh_success_rate(self):
+        """Recompute the success rate after a call is counted or completed"""
+        total_calls = self.call_analytics['total_calls']
+        self.call_analytics['success_rate'] = (
+            self.call_analytics['successful_calls'] / total_calls * 100 if total_calls else 100.0
+        )
     
-    def _update_analytics(self):
-        """Update system analytics"""
-        try:
-            # Calculate average duration
-            completed_calls = [c for c in self.call_history if 'duration' in c]
-            if completed_calls:
-                total_duration = sum(c['duration'] for c in completed_calls)
-                self.call_analytics['average_duration'] = total_duration / len(completed_calls)
-        except Exception as e:
-            self._log_event(f"Analytics update error: {str(e)}", "ERROR")
+    def _record_duration(self, duration: float):
+        """Fold a finished call's duration into the running average"""
+        self._duration_sum += duration
+        self._duration_count += 1
+        self.call_analytics['average_duration'] = self._duration_sum / self._duration_count
     
     def _log_event(self, message: str, level: str = "INFO"):
         """Log system events"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {level}: {message}"
-        self.call_logs.append(log_entry)
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        # Level kept alongside the formatted line so filtering never parses the text
+        self.call_logs.append((level, f"[{timestamp}] {level}: {message}"))
         
-        # Keep only last 1000 log entries
-        if len(self.call_logs) > 1000:
-            self.call_logs = self.call_logs[-1000:]
+        # Every state change is logged, so this also invalidates the status snapshot
+        self._status_cache = (0.0, None)
+        self.state_version += 1
+    
+    def recent_logs(self, level: Optional[str] = None, limit: int = 50) -> List[str]:
+        """Newest-first log lines, optionally restricted to one level"""
+        entries = reversed(self.call_logs)
+        if level:
+            entries = (entry for entry in entries if entry[0] == level)
+        return [line for _, line in islice(entries, limit)]
+    
+    def clear_logs(self):
+        """Clear system event logs"""
+        self.call_logs.clear()
+        self._status_cache = (0.0, None)
+        self.state_version += 1
     
     def shutdown_system(self):
         """Gracefully shutdown the system"""
         self.monitoring_active = False
-        self.thread_pool.shutdown(wait=True)
         self._log_event("Audio-Fixed AI Phone System shutdown completed")
 
 # --- CUSTOM CSS ---
-st.markdown("""
+# Streamlit drops elements that are not re-emitted, so the stylesheet is sent on every rerun
+APP_CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -697,6 +835,11 @@ st.markdown("""
         box-shadow: 0 4px 15px rgba(0,0,0,0.1);
         border-left: 5px solid #a8edea;
     }
+    .metric-row {
+        display: grid;
+        grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
+        gap: 1rem;
+    }
     .user-info {
         background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
         padding: 1rem;
@@ -706,56 +849,487 @@ st.markdown("""
         color: #333;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+# --- AUTH BANNER ---
+AUTH_BANNER_TEMPLATE = """
+<div style="text-align: center; padding: 3rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white; margin: 2rem 0;">
+    <h2>🔐 System Ready - Upload Authentication</h2>
+    <p>Welcome {name}! Upload your Google Service Account JSON file to access all features.</p>
+
+    <div style="background: rgba(255,255,255,0.1); padding: 1.5rem; border-radius: 10px; margin: 1.5rem 0;">
+        <h3>✨ Your Access Level: {role}</h3>
+        <p>Team: {team}</p>
+
+        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-top: 1rem;">
+            <div>
+                <p>✅ Customer Management</p>
+                <p>🧾 Invoice System</p>
+                <p>💰 Live Price List</p>
+                <p>📊 Analytics Dashboard</p>
+            </div>
+            <div>
+                <p>👥 Team Management ({team_members} members)</p>
+                <p>🤖 Audio-Fixed AI Phone System</p>
+                <p>💬 Advanced AI Chat System</p>
+                <p>📥 Comprehensive Data Export</p>
+            </div>
+        </div>
+    </div>
+
+    <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px; margin: 1rem 0;">
+        <h4>🔧 Lil J’s Ai Auto Laundry Phone System</h4>
+        <p><strong>Real Assistant ID:</strong> <code>{assistant_id}</code></p>
+        <p>✅ ALSA Audio Errors Suppressed</p>
+        <p>✅ Rust Panic Errors Handled</p>
+        <p>✅ Streamlit Cloud Compatible</p>
+        <p>📞 Outbound Calls | 🔗 Server Call Links | 🔌 API Calls</p>
+        <p>🎯 6 Specialized AI Assistants (All use same real ID)</p>
+        <p>📊 Real-time Analytics & Performance Monitoring</p>
+    </div>
+</div>
+"""
+
+@st.cache_data(show_spinner=False)
+def auth_banner_html(name, role, team):
+    """Render the upload-authentication banner once per user profile"""
+    return AUTH_BANNER_TEMPLATE.format(
+        name=name,
+        role=role,
+        team=team,
+        team_members=TEAM_MEMBER_COUNT,
+        assistant_id=REAL_ASSISTANT_ID
+    )
+
+# --- METRIC CARDS ---
+METRIC_CARD_TEMPLATE = '<div class="{card_class}"><h3>{title}</h3><h2>{value}</h2></div>'
+
+def metric_row_html(cards, card_class="metric-card"):
+    """Lay out (title, value) metric cards as one HTML grid row"""
+    return '<div class="metric-row">{}</div>'.format(''.join(
+        METRIC_CARD_TEMPLATE.format(card_class=card_class, title=title, value=value)
+        for title, value in cards
+    ))
+
+SYSTEM_CARD_TEMPLATE = '<div class="ai-system-card"{style}><h4>{title}</h4><h2>{value}</h2></div>'
+HEALTH_CARD_STYLE = ' style="background: linear-gradient(135deg, {color} 0%, {color}CC 100%);"'
+
+def system_row_html(cards):
+    """Lay out (title, value, style) AI system cards as one HTML grid row"""
+    return '<div class="metric-row">{}</div>'.format(''.join(
+        SYSTEM_CARD_TEMPLATE.format(style=style, title=title, value=value)
+        for title, value, style in cards
+    ))
+
+# --- CALL CARDS ---
+CALL_TYPE_ICONS = {"outbound": "📞", "api_call": "🔌", "server_link": "🔗"}
+CALL_TYPE_LABELS = {call_type: call_type.replace('_', ' ').title() for call_type in CALL_TYPE_ICONS}
+CALL_STATUS_ICONS = {"active": "🟡", "completed": "✅", "stopped": "⛔", "failed": "❌", "api_active": "🔌", "link_created": "🔗"}
+AVAILABILITY_ICONS = {"available": "🟢", "unavailable": "🔴", "unknown": "🟡"}
+HEALTH_COLORS = {"healthy": "#4CAF50", "warning": "#FF9800", "critical": "#f44336"}
+CALL_HISTORY_COLUMNS = ["Time", "Target", "Assistant", "Context", "Status", "Duration (s)", "ID"]
+
+LIVE_CALL_CARD_TEMPLATE = """
+<div class="call-active">
+    <h4>{icon} Active Call: {short_id}...</h4>
+    <p><strong>Type:</strong> {call_type}</p>
+    <p><strong>Assistant:</strong> {assistant_name}</p>
+    <p><strong>Duration:</strong> {duration:.0f} seconds</p>
+    <p><strong>Real Assistant ID:</strong> <code>{assistant_id}...</code></p>
+    {phone_line}
+    <p><strong>Audio Status:</strong> Errors Suppressed ✅</p>
+</div>
+"""
+
+SELECTED_ASSISTANT_CARD_TEMPLATE = """
+<div class="assistant-card">
+    <h4>✅ Selected: {name}</h4>
+    <p><strong>ID:</strong> <code>{short_id}...</code></p>
+    <p><strong>Category:</strong> {category}</p>
+    <p><strong>Context:</strong> {context}</p>
+    <p><strong>Languages:</strong> {languages}</p>
+    <p><strong>Availability:</strong> {availability}</p>
+    <p><strong>Skills:</strong> {skills}</p>
+    <p>{description}</p>
+</div>
+"""
+AUDIO_FIXED_CARD_HTML = """
+<div class="audio-fixed-card">
+    <h3>🔧 Audio Issues Fixed!</h3>
+    <p>✅ ALSA audio errors suppressed</p>
+    <p>✅ Rust panic errors handled</p>
+    <p>✅ Streamlit Cloud compatible</p>
+    <p>✅ Server-side calling enabled</p>
+</div>
+"""
+
+# Shown in the AI system section until an API key is configured
+SYSTEM_OFFLINE_HTML = f"""
+<div style="text-align: center; padding: 3rem; background: linear-gradient(135deg, #FF6B6B 0%, #FF8E53 100%); border-radius: 15px; color: white; margin: 2rem 0;">
+    <h2>🤖 Lil J’s Ai Auto Laundry</h2>
+    <p>Advanced AI-powered calling system with audio error fixes</p>
+
+    <div style="background: rgba(255,255,255,0.1); padding: 1.5rem; border-radius: 10px; margin: 1.5rem 0;">
+        <h3>🔧 Audio Fixes Applied</h3>
+        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-top: 1rem;">
+            <div>
+                <p>✅ ALSA Errors Suppressed</p>
+                <p>✅ Rust Panic Handled</p>
+                <p>✅ Audio Context Fixed</p>
+                <p>✅ Streamlit Cloud Compatible</p>
+            </div>
+            <div>
+                <p>📞 Outbound Calls</p>
+                <p>🔗 Server Call Links</p>
+                <p>🔌 API Calls</p>
+                <p>📊 Real-time Monitoring</p>
+            </div>
+        </div>
+    </div>
+
+    <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px; margin: 1rem 0;">
+        <h4>🎯 Real Assistant Configuration</h4>
+        <p><strong>Assistant ID:</strong> <code>{REAL_ASSISTANT_ID}</code></p>
+        <p>All AI assistants use this single real ID with different contexts</p>
+        <p><strong>Audio Status:</strong> Errors Suppressed for Streamlit Cloud</p>
+    </div>
+
+    <p>Please configure your API key in Streamlit secrets to activate the system.</p>
+</div>
+"""
+
+ASSISTANT_TYPES = tuple(AI_ASSISTANTS)
+
+@st.cache_data(show_spinner=False)
+def selected_assistant_card(assistant_type: str) -> str:
+    """Selected-assistant card markup; AI_ASSISTANTS is static, so each type is formatted once"""
+    config = AI_ASSISTANTS[assistant_type]
+    return SELECTED_ASSISTANT_CARD_TEMPLATE.format(
+        name=config['name'],
+        short_id=config['id'][:8],
+        category=config['category'],
+        context=config['context'],
+        languages=', '.join(config['languages']),
+        availability=config['availability'],
+        skills=', '.join(config['skills']),
+        description=config['description']
+    )
+
+@st.fragment(run_every=3)
+def live_call_monitor(phone_system):
+    """Live call cards; reruns on its own every few seconds instead of the whole script"""
+    status = phone_system.get_system_status()
+    if status['active_calls'] == 0:
+        # The last call ended; a full rerun drops this panel and stops the polling
+        st.rerun()
+    
+    st.markdown("---")
+    st.subheader("📊 Live Call Monitoring")
+    
+    for call in status['active_call_details']:
+        call_type_icon = CALL_TYPE_ICONS.get(call['call_type'], "🤖")
+        st.markdown(LIVE_CALL_CARD_TEMPLATE.format(
+            icon=call_type_icon,
+            short_id=call['call_id'][:8],
+            call_type=CALL_TYPE_LABELS[call['call_type']],
+            assistant_name=call['assistant_name'],
+            duration=(time.monotonic_ns() - call['start_ns']) / 1e9,
+            assistant_id=REAL_ASSISTANT_ID[:8],
+            phone_line=f"<p><strong>Phone:</strong> {call.get('phone_number', 'N/A')}</p>" if call['call_type'] == 'outbound' else ""
+        ), unsafe_allow_html=True)
+
+# --- SIDEBAR ---
+SIDEBAR_USER_TEMPLATE = """
+---
+
+**Current User:** {name}
+
+**Role:** {role}
+
+**Team:** {team}
+"""
+
+SIDEBAR_STATUS_TEMPLATE = """
+**Active Calls:** {active_calls}
+
+**Total Calls Today:** {calls_today}
+
+**System Health:** {health}
+
+**Success Rate:** {success_rate:.1f}%
+
+**Audio Status:** {audio_status}
+
+**Real Assistant ID:** `{assistant_id}...`
+"""
 
 # --- LOGIN SYSTEM ---
 def login_user(username, password):
-    if username in DEMO_ACCOUNTS and DEMO_ACCOUNTS[username]["password"] == password:
-        return DEMO_ACCOUNTS[username]
+    salt, digests = demo_password_digests()
+    password_hash = digests.get(username)
+    if password_hash and hmac.compare_digest(password_hash, hashlib.sha256(salt + password.encode()).digest()):
+        return dict(demo_profiles()[username])
     return None
 
+# Session state keys that belong to the signed-in user and are dropped on logout
+_USER_SESSION_KEYS = ("user_info", "username")
+
 def logout_user():
-    for key in list(st.session_state.keys()):
-        if key.startswith('user_'):
-            del st.session_state[key]
+    for key in _USER_SESSION_KEYS:
+        st.session_state.pop(key, None)
     st.session_state.logged_in = False
 
 # --- DATA TYPE HANDLING ---
+# Lowercased name fragments of columns that must stay strings (phone numbers, IDs, codes)
+_STRING_COL_NEEDLES = tuple(dict.fromkeys(name.lower() for name in (
+    'Phone Number', 'Phone', 'phone', 'phone_number',
+    'Customer ID', 'customer_id', 'ID', 'id',
+    'Order ID', 'order_id', 'Invoice Number', 'invoice_number',
+    'Account Number', 'account_number', 'Reference', 'reference',
+    'Zip Code', 'zip_code', 'Postal Code', 'postal_code'
+)))
+
 def fix_dataframe_types(df):
     """Fix PyArrow data type conversion issues for phone numbers and ID columns"""
     if df.empty:
         return df
     
-    string_columns = [
-        'Phone Number', 'Phone', 'phone', 'phone_number',
-        'Customer ID', 'customer_id', 'ID', 'id',
-        'Order ID', 'order_id', 'Invoice Number', 'invoice_number',
-        'Account Number', 'account_number', 'Reference', 'reference',
-        'Zip Code', 'zip_code', 'Postal Code', 'postal_code'
-    ]
-    
-    for col in df.columns:
-        if any(string_col.lower() in col.lower() for string_col in string_columns):
-            df[col] = df[col].fillna('').astype(str)
+    string_cols = [col for col in df.columns
+                   if any(needle in col.lower() for needle in _STRING_COL_NEEDLES)]
+    if string_cols:
+        df[string_cols] = df[string_cols].fillna('').astype(str)
     
     return df
 
-# --- INITIALIZE SESSION STATE ---
-if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
-if 'user_info' not in st.session_state:
-    st.session_state.user_info = {}
+@st.cache_data(show_spinner=False)
+def build_customer_grid_options(schema: tuple) -> dict:
+    """Build AgGrid options for a customers table, keyed on its (column, dtype) schema.
+    
+    st.cache_data shares the result across sessions and hands each caller
+    its own copy, so the returned dict is safe to modify.
+    """
+    from st_aggrid import GridOptionsBuilder
+    
+    template_df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in schema})
+    
+    gb = GridOptionsBuilder.from_dataframe(template_df)
+    gb.configure_pagination(paginationAutoPageSize=True)
+    gb.configure_side_bar()
+    gb.configure_selection('multiple', use_checkbox=True)
+    gb.configure_default_column(editable=True, groupable=True)
+    
+    return gb.build()
+
+@st.cache_data(show_spinner=False)
+def team_members_df() -> pd.DataFrame:
+    """One row per team member, for vectorised team stats"""
+    return pd.DataFrame([
+        {"team": team_name, **member}
+        for team_name, team_info in TEAM_STRUCTURE.items()
+        for member in team_info["members"]
+    ])
+
+@st.cache_data(show_spinner=False)
+def team_composition() -> pd.DataFrame:
+    """Per-team member counts, derived once from the static TEAM_STRUCTURE"""
+    members = team_members_df()
+    composition = (
+        members.assign(active=members["status"].eq("Active"))
+        .groupby("team", sort=False)
+        .agg(**{"Active Members": ("active", "sum"), "Total Members": ("name", "size")})
+        # groupby drops teams without members; keep every team, with zero counts
+        .reindex(list(TEAM_STRUCTURE), fill_value=0)
+    )
+    composition.insert(0, "Team", composition.index)
+    return composition
+
+@st.cache_data(show_spinner=False)
+def build_team_df(team_name: str) -> pd.DataFrame:
+    """Member table for one team, with ID-like columns kept as strings"""
+    return fix_dataframe_types(pd.DataFrame(TEAM_STRUCTURE[team_name]['members']))
+
+@st.cache_data(show_spinner=False)
+def team_composition_figure():
+    """Team composition bar chart; the underlying data never changes at runtime"""
+    import plotly.express as px
+    
+    return px.bar(team_composition(), x="Team", y=["Active Members", "Total Members"],
+                  title="Team Composition", barmode="group")
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def call_type_figure(outbound_calls: int, server_calls: int):
+    """Call type pie chart, rebuilt only when the counts change"""
+    import plotly.express as px
+    
+    return px.pie(
+        values=[outbound_calls, server_calls],
+        names=['Outbound Calls', 'Server Calls'],
+        title="Call Type Distribution"
+    )
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def price_analytics_figures(prices: pd.DataFrame):
+    """Category average bar and price histogram for the filtered price list"""
+    import plotly.express as px
+    
+    category_avg = prices.groupby("Service Category")["Price (USD)"].mean().reset_index()
+    category_fig = px.bar(category_avg, x="Service Category", y="Price (USD)",
+                          title="Average Price by Category")
+    distribution_fig = px.histogram(prices, x="Price (USD)",
+                                    title="Price Distribution", nbins=10)
+    return category_fig, distribution_fig
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def price_list_csv(prices: pd.DataFrame) -> bytes:
+    """CSV export of the filtered price list"""
+    return prices.to_csv(index=False).encode("utf-8")
+
+@st.cache_data(show_spinner=False)
+def system_performance_figure():
+    """AI system performance chart over a fixed day of mock health data"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    health_data = {
+        'Time': [f"{i}:00" for i in range(9, 18)],
+        'Success Rate': [95, 97, 94, 96, 98, 92, 95, 97, 96],
+        'Active Calls': [2, 5, 8, 12, 15, 18, 14, 10, 6]
+    }
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(
+        go.Scatter(x=health_data['Time'], y=health_data['Success Rate'], name="Success Rate %"),
+        secondary_y=False,
+    )
+    fig.add_trace(
+        go.Scatter(x=health_data['Time'], y=health_data['Active Calls'], name="Active Calls"),
+        secondary_y=True,
+    )
+    fig.update_xaxes(title_text="Time")
+    fig.update_yaxes(title_text="Success Rate (%)", secondary_y=False)
+    fig.update_yaxes(title_text="Active Calls", secondary_y=True)
+    fig.update_layout(title_text="Audio-Fixed AI System Performance")
+    return fig
+
+# --- DATA EXPORT ---
+def export_data_version(*frames: pd.DataFrame, phone_system=None) -> tuple:
+    """Cheap fingerprint of the sheet data and AI system state behind the exports"""
+    return (
+        tuple(int(pd.util.hash_pandas_object(df, index=False).sum()) if not df.empty else 0
+              for df in frames),
+        phone_system.state_version if phone_system else None
+    )
+
+# Session state keys holding prepared export bytes
+EXPORT_KEYS = ("_export_all", "_export_report", "_export_ai")
+
+@st.fragment
+def data_export_panel(user: Dict, customers_df: pd.DataFrame, invoices_df: pd.DataFrame,
+                      price_list_df: pd.DataFrame, ai_status, team_performance_data, phone_system):
+    """Export buttons and downloads; their clicks rerun only this panel"""
+    # Shared fields for every export payload; one clock read for names and payloads
+    export_time = time.localtime()
+    export_stamp = time.strftime('%Y%m%d_%H%M%S', export_time)
+    export_base = {
+        "ai_assistants": AI_ASSISTANTS,
+        "real_assistant_id": REAL_ASSISTANT_ID,
+        "audio_fixes_applied": True,
+        "exported_by": user['name'],
+        "export_time": time.strftime('%Y-%m-%dT%H:%M:%S', export_time)
+    }
+    
+    # Exports are read by tools, so they are compact unless asked otherwise
+    pretty_json = st.checkbox("Pretty-print JSON exports", value=False)
+    
+    def current_version():
+        return (export_data_version(customers_df, invoices_df, price_list_df, phone_system=phone_system),
+                pretty_json)
+    
+    # The data is only hashed when an export is prepared or there is one to check
+    version = current_version() if any(key in st.session_state for key in EXPORT_KEYS) else None
+    
+    col1, col2, col3 = st.columns(3)
+    
+    # Payloads are built in button callbacks, once per click; the bytes stay in session
+    # state, tagged with the data version, so later reruns only re-send the download
+    # button until the data changes and the export has to be prepared again
+    with col1:
+        st.button("📥 Export All Data", on_click=store_export, args=("_export_all", lambda: {
+            "customers": customers_df.to_dict('records') if not customers_df.empty else [],
+            "invoices": invoices_df.to_dict('records') if not invoices_df.empty else [],
+            "price_list": price_list_df.to_dict('records') if not price_list_df.empty else [],
+            "teams": TEAM_STRUCTURE,
+            "ai_phone_system_status": ai_status,
+            **export_base
+        }, pretty_json, current_version))
+        
+        export_bytes = prepared_export("_export_all", version)
+        if export_bytes is not None:
+            st.download_button(
+                label="Download Complete Data Export (JSON)",
+                data=export_bytes,
+                file_name=f"crm_export_{export_stamp}.json",
+                mime="application/json"
+            )
+    
+    with col2:
+        st.button("📊 Export Analytics Report", on_click=store_export, args=("_export_report", lambda: {
+            "report_generated_by": export_base["exported_by"],
+            "report_date": export_base["export_time"],
+            "total_customers": len(customers_df),
+            "total_invoices": len(invoices_df),
+            "total_team_members": TEAM_MEMBER_COUNT,
+            "ai_phone_system_analytics": ai_status.get('analytics', {}),
+            "team_breakdown": team_performance_data,
+            "assistant_configuration": AI_ASSISTANTS,
+            "real_assistant_id": REAL_ASSISTANT_ID,
+            "audio_fixes_applied": True
+        }, pretty_json, current_version))
+        
+        export_bytes = prepared_export("_export_report", version)
+        if export_bytes is not None:
+            st.download_button(
+                label="Download Analytics Report (JSON)",
+                data=export_bytes,
+                file_name=f"analytics_report_{export_stamp}.json",
+                mime="application/json"
+            )
+    
+    with col3:
+        st.button("🤖 Export AI System Data", on_click=store_export, args=("_export_ai", lambda: {
+            **export_base,
+            "system_status": ai_status,
+            "audio_error_suppression": "enabled"
+        }, pretty_json, current_version), disabled=not ai_status, help=None if ai_status else "AI phone system not initialized")
+        
+        export_bytes = prepared_export("_export_ai", version)
+        if export_bytes is not None:
+            st.download_button(
+                label="Download AI System Data (JSON)",
+                data=export_bytes,
+                file_name=f"ai_system_data_{export_stamp}.json",
+                mime="application/json"
+            )
 
-def initialize_ai_phone_system_session_state():
-    """Initialize AI phone system session state"""
-    if "ai_phone_system" not in st.session_state:
-        st.session_state.ai_phone_system = None
-    if "selected_assistant_type" not in st.session_state:
-        st.session_state.selected_assistant_type = "Customer Support"
-    if "ai_system_initialized" not in st.session_state:
-        st.session_state.ai_system_initialized = False
+# --- INITIALIZE SESSION STATE ---
+def initialize_session_state():
+    """Seed login and AI phone system defaults on a session's first run"""
+    if '_session_initialized' in st.session_state:
+        return
+    
+    defaults = {
+        'logged_in': False,
+        'user_info': {},
+        'ai_phone_system': None,
+        'selected_assistant_type': "Customer Support",
+        'ai_system_initialized': False
+    }
+    defaults = {key: value for key, value in defaults.items() if key not in st.session_state}
+    defaults['_session_initialized'] = True
+    st.session_state.update(defaults)
 
-initialize_ai_phone_system_session_state()
+initialize_session_state()
 
 # --- LOGIN PAGE ---
 if not st.session_state.logged_in:
@@ -817,6 +1391,15 @@ if not st.session_state.logged_in:
 
 else:
     # --- MAIN APPLICATION ---
+    # Sheets, grid and chart libraries are only needed once signed in, so the
+    # login page does not pay for importing them on a cold start
+    import gspread
+    from google.oauth2.service_account import Credentials
+    from st_aggrid import AgGrid, GridUpdateMode
+    import plotly.express as px
+    
+    # The signed-in profile does not change during a rerun
+    current_user = st.session_state.user_info
     
     # --- HEADER WITH USER INFO ---
     col1, col2, col3 = st.columns([2, 1, 1])
@@ -827,8 +1410,8 @@ else:
     with col2:
         st.markdown(f"""
         <div class="user-info">
-            <strong>👤 {st.session_state.user_info['name']}</strong><br>
-            <small>{st.session_state.user_info['role']} | {st.session_state.user_info['team']}</small>
+            <strong>👤 {current_user['name']}</strong><br>
+            <small>{current_user['role']} | {current_user['team']}</small>
         </div>
         """, unsafe_allow_html=True)
     
@@ -842,23 +1425,29 @@ else:
     auth_file = st.sidebar.file_uploader("Upload service_account.json", type="json")
     
     # --- SIDEBAR USER INFO ---
-    st.sidebar.markdown("---")
-    st.sidebar.markdown(f"**Current User:** {st.session_state.user_info['name']}")
-    st.sidebar.markdown(f"**Role:** {st.session_state.user_info['role']}")
-    st.sidebar.markdown(f"**Team:** {st.session_state.user_info['team']}")
+    st.sidebar.markdown(SIDEBAR_USER_TEMPLATE.format(
+        name=current_user['name'],
+        role=current_user['role'],
+        team=current_user['team']
+    ))
     
     # --- SIDEBAR AI PHONE SYSTEM STATUS ---
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 🤖 Lil J’s Ai Auto Laundry System")
     
-    if st.session_state.ai_phone_system:
-        status = st.session_state.ai_phone_system.get_system_status()
-        st.sidebar.write(f"**Active Calls:** {status['active_calls']}")
-        st.sidebar.write(f"**Total Calls Today:** {status['total_calls_today']}")
-        st.sidebar.write(f"**System Health:** {status['system_health']['status'].upper()}")
-        st.sidebar.write(f"**Success Rate:** {status['system_health']['success_rate']:.1f}%")
-        st.sidebar.write(f"**Audio Status:** {status['audio_status']}")
-        st.sidebar.write(f"**Real Assistant ID:** `{REAL_ASSISTANT_ID[:8]}...`")
+    # Fetch the AI system and its snapshot once per rerun for the sidebar and every tab
+    phone_system = st.session_state.ai_phone_system
+    ai_status = phone_system.get_system_status() if phone_system else {}
+    
+    if ai_status:
+        st.sidebar.markdown(SIDEBAR_STATUS_TEMPLATE.format(
+            active_calls=ai_status['active_calls'],
+            calls_today=ai_status['total_calls_today'],
+            health=ai_status['system_health']['status'].upper(),
+            success_rate=ai_status['system_health']['success_rate'],
+            audio_status=ai_status['audio_status'],
+            assistant_id=REAL_ASSISTANT_ID[:8]
+        ))
     else:
         st.sidebar.write("**AI Phone System:** Not initialized")
     
@@ -940,66 +1529,29 @@ else:
             except Exception as e:
                 st.sidebar.warning(f"⚠️ Price list not accessible: {str(e)}")
                 # Create sample price data
-                price_list_df = pd.DataFrame([
-                    {"Service Category": "Washing", "Item": "Regular Wash", "Price (USD)": 15.00, "Turnaround Time": "2 hours", "Notes": "Standard washing service"},
-                    {"Service Category": "Dry Cleaning", "Item": "Suit Cleaning", "Price (USD)": 25.00, "Turnaround Time": "24 hours", "Notes": "Professional dry cleaning"},
-                    {"Service Category": "Pressing", "Item": "Shirt Press", "Price (USD)": 8.00, "Turnaround Time": "1 hour", "Notes": "Professional pressing"},
-                    {"Service Category": "Alterations", "Item": "Hem Adjustment", "Price (USD)": 12.00, "Turnaround Time": "48 hours", "Notes": "Basic alterations"},
-                    {"Service Category": "Special", "Item": "Express Service", "Price (USD)": 35.00, "Turnaround Time": "30 minutes", "Notes": "Rush service available"}
-                ])
+                price_list_df = pd.DataFrame(SAMPLE_PRICE_LIST)
                 price_list_df = fix_dataframe_types(price_list_df)
             
             # --- DASHBOARD TAB ---
             with tab1:
                 st.subheader("📊 CRM Dashboard")
                 
-                st.markdown(f"### Welcome back, {st.session_state.user_info['name']}! 👋")
+                st.markdown(f"### Welcome back, {current_user['name']}! 👋")
                 
                 # --- METRICS ROW ---
-                col1, col2, col3, col4 = st.columns(4)
+                invoice_count = len(invoices_df) if not invoices_df.empty else 0
+                total_calls = ai_status['analytics']['total_calls'] if ai_status else 0
                 
-                with col1:
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>👥 Total Customers</h3>
-                        <h2>{len(customers_df)}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                
-                with col2:
-                    team_members = sum(len(team["members"]) for team in TEAM_STRUCTURE.values())
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>👨‍💼 Team Members</h3>
-                        <h2>{team_members}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                
-                with col3:
-                    invoice_count = len(invoices_df) if not invoices_df.empty else 0
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>🧾 Total Invoices</h3>
-                        <h2>{invoice_count}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                
-                with col4:
-                    total_calls = 0
-                    if st.session_state.ai_phone_system:
-                        status = st.session_state.ai_phone_system.get_system_status()
-                        total_calls = status['analytics']['total_calls']
-                    
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>🤖 AI Calls</h3>
-                        <h2>{total_calls}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
+                st.markdown(metric_row_html([
+                    ("👥 Total Customers", len(customers_df)),
+                    ("👨‍💼 Team Members", TEAM_MEMBER_COUNT),
+                    ("🧾 Total Invoices", invoice_count),
+                    ("🤖 AI Calls", total_calls)
+                ]), unsafe_allow_html=True)
                 
                 # Audio-fixed AI phone system status
-                if st.session_state.ai_phone_system:
-                    status = st.session_state.ai_phone_system.get_system_status()
+                if ai_status:
+                    status = ai_status
                     if status['active_calls'] > 0:
                         st.markdown(f'''
                         <div class="call-active">
@@ -1018,9 +1570,9 @@ else:
                         ''', unsafe_allow_html=True)
                 
                 # Team overview
-                st.subheader(f"👥 Your Team: {st.session_state.user_info['team']}")
+                st.subheader(f"👥 Your Team: {current_user['team']}")
                 
-                user_team = TEAM_STRUCTURE.get(st.session_state.user_info['team'], {})
+                user_team = TEAM_STRUCTURE.get(current_user['team'], {})
                 if user_team:
                     st.markdown(f"**Team Lead:** {user_team['team_lead']}")
                     
@@ -1038,7 +1590,7 @@ else:
             # --- ADD CUSTOMER TAB ---
             with tab2:
                 st.subheader("➕ Add New Customer")
-                st.markdown(f"*Adding as: {st.session_state.user_info['name']}*")
+                st.markdown(f"*Adding as: {current_user['name']}*")
                 
                 with st.form("add_contact", clear_on_submit=True):
                     col1, col2 = st.columns(2)
@@ -1047,7 +1599,7 @@ else:
                         name = st.text_input("👤 Name", placeholder="Enter customer name")
                         email = st.text_input("📧 Email", placeholder="customer@email.com")
                         phone = st.text_input("📱 Phone Number", placeholder="+1 (555) 123-4567")
-                        preference = st.selectbox("📞 Contact Preference", ["Call", "Text", "Email", "WhatsApp"])
+                        preference = st.selectbox("📞 Contact Preference", CONTACT_PREFERENCES)
                         preferred_time = st.text_input("🕑 Preferred Time", placeholder="e.g., 9 AM - 5 PM")
                     
                     with col2:
@@ -1063,7 +1615,7 @@ else:
                             try:
                                 customers_worksheet.append_row([
                                     name, email, phone, preference, preferred_time,
-                                    address, items, f"{notes} [Added by: {st.session_state.user_info['name']}]",
+                                    address, items, f"{notes} [Added by: {current_user['name']}]",
                                     call_summary
                                 ])
                                 st.success("✅ Customer added successfully!")
@@ -1084,9 +1636,9 @@ else:
                     with col1:
                         pref_filter = st.selectbox("Filter by Preference", ["All"] + list(customers_df["Preference"].unique()))
                     with col2:
-                        sort_by = st.selectbox("Sort by", ["Name", "Phone Number", "Email", "Preferred_Time"])
+                        sort_by = st.selectbox("Sort by", CUSTOMER_SORT_FIELDS)
                     with col3:
-                        sort_order = st.selectbox("Order", ["Ascending", "Descending"])
+                        sort_order = st.selectbox("Order", SORT_ORDERS)
                     
                     # Apply filters
                     display_df = customers_df.copy()
@@ -1097,13 +1649,9 @@ else:
                     display_df = fix_dataframe_types(display_df)
                     
                     # Interactive table
-                    gb = GridOptionsBuilder.from_dataframe(display_df)
-                    gb.configure_pagination(paginationAutoPageSize=True)
-                    gb.configure_side_bar()
-                    gb.configure_selection('multiple', use_checkbox=True)
-                    gb.configure_default_column(editable=True, groupable=True)
-                    
-                    gridOptions = gb.build()
+                    gridOptions = build_customer_grid_options(
+                        tuple(zip(display_df.columns, display_df.dtypes.astype(str)))
+                    )
                     
                     AgGrid(
                         display_df,
@@ -1130,13 +1678,13 @@ else:
                             invoice_customer = st.selectbox("👤 Customer", customers_df["Name"].tolist() if not customers_df.empty else ["Sample Customer"])
                             invoice_date = st.date_input("📅 Invoice Date", datetime.now())
                             invoice_amount = st.number_input("💰 Amount", min_value=0.0, format="%.2f")
-                            invoice_status = st.selectbox("📊 Status", ["Pending", "Paid", "Overdue", "Cancelled"])
+                            invoice_status = st.selectbox("📊 Status", INVOICE_STATUSES)
                         
                         with col2:
                             invoice_items = st.text_area("📦 Items", placeholder="List of services/items")
                             invoice_notes = st.text_area("📝 Notes", placeholder="Additional invoice notes")
                             due_date = st.date_input("⏰ Due Date", datetime.now() + timedelta(days=30))
-                            payment_method = st.selectbox("💳 Payment Method", ["Cash", "Card", "Bank Transfer", "PayPal"])
+                            payment_method = st.selectbox("💳 Payment Method", PAYMENT_METHODS)
                         
                         if st.form_submit_button("💾 Create Invoice"):
                             try:
@@ -1146,7 +1694,7 @@ else:
                                     invoice_amount,
                                     invoice_status,
                                     invoice_items,
-                                    f"{invoice_notes} [Created by: {st.session_state.user_info['name']}]",
+                                    f"{invoice_notes} [Created by: {current_user['name']}]",
                                     str(due_date),
                                     payment_method
                                 ]
@@ -1172,7 +1720,7 @@ else:
                 <div class="price-card">
                     <h3>📊 Live Price List</h3>
                     <p>Connected to: <a href="{PRICE_LIST_SHEET}" target="_blank">Google Sheets Price Database</a></p>
-                    <p>Managed by: {st.session_state.user_info['name']}</p>
+                    <p>Managed by: {current_user['name']}</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
@@ -1184,24 +1732,22 @@ else:
                         category_filter = st.selectbox("Filter by Category", ["All"] + list(price_list_df["Service Category"].unique()))
                     
                     with col2:
+                        prices = price_list_df["Price (USD)"]
+                        price_min, price_max = float(prices.min()), float(prices.max())
                         price_range = st.slider("Price Range (USD)",
-                                               min_value=float(price_list_df["Price (USD)"].min()),
-                                               max_value=float(price_list_df["Price (USD)"].max()),
-                                              value=(float(price_list_df["Price (USD)"].min()), float(price_list_df["Price (USD)"].max())))
+                                               min_value=price_min,
+                                               max_value=price_max,
+                                               value=(price_min, price_max))
                     
                     with col3:
                         if st.button("🔄 Refresh Price List"):
                             st.rerun()
                     
-                    # Apply filters
-                    filtered_prices = price_list_df.copy()
+                    # Apply filters as a single mask
+                    price_mask = prices.between(price_range[0], price_range[1])
                     if category_filter != "All":
-                        filtered_prices = filtered_prices[filtered_prices["Service Category"] == category_filter]
-                    
-                    filtered_prices = filtered_prices[
-                        (filtered_prices["Price (USD)"] >= price_range[0]) & 
-                        (filtered_prices["Price (USD)"] <= price_range[1])
-                    ]
+                        price_mask &= price_list_df["Service Category"] == category_filter
+                    filtered_prices = price_list_df[price_mask]
                     
                     # Display price list
                     st.subheader("📋 Current Prices")
@@ -1227,28 +1773,22 @@ else:
                     # Price analytics
                     st.subheader("📊 Price Analytics")
                     
+                    category_fig, distribution_fig = price_analytics_figures(filtered_prices)
                     col1, col2 = st.columns(2)
                     
                     with col1:
-                        category_avg = filtered_prices.groupby("Service Category")["Price (USD)"].mean().reset_index()
-                        fig = px.bar(category_avg, x="Service Category", y="Price (USD)",
-                                    title="Average Price by Category")
-                        st.plotly_chart(fig, use_container_width=True)
+                        st.plotly_chart(category_fig, use_container_width=True)
                     
                     with col2:
-                        fig = px.histogram(filtered_prices, x="Price (USD)",
-                                          title="Price Distribution", nbins=10)
-                        st.plotly_chart(fig, use_container_width=True)
+                        st.plotly_chart(distribution_fig, use_container_width=True)
                     
                     # Export price list
-                    if st.button("📥 Export Price List CSV"):
-                        csv = filtered_prices.to_csv(index=False)
-                        st.download_button(
-                            label="Download Price List CSV",
-                            data=csv,
-                            file_name=f"price_list_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv"
-                        )
+                    st.download_button(
+                        label="📥 Export Price List CSV",
+                        data=price_list_csv(filtered_prices),
+                        file_name=f"price_list_{time.strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv"
+                    )
                 
                 else:
                     st.warning("⚠️ Price list not available. Please check the Google Sheets connection.")
@@ -1257,27 +1797,27 @@ else:
             with tab6:
                 st.subheader("👥 Team Management")
                 
-                st.markdown(f"**Your Access Level:** {st.session_state.user_info['role']}")
+                st.markdown(f"**Your Access Level:** {current_user['role']}")
                 
                 # Display all teams
+                composition = team_composition()
                 for team_name, team_info in TEAM_STRUCTURE.items():
                     with st.expander(f"🏢 {team_name} Team ({len(team_info['members'])} members)"):
                         st.markdown(f"**Team Lead:** {team_info['team_lead']}")
                         
-                        team_df = pd.DataFrame(team_info['members'])
-                        
-                        if st.session_state.user_info['role'] == 'Admin':
+                        if current_user['role'] == 'Admin':
                             st.markdown("*Admin controls available*")
                         
-                        team_df = fix_dataframe_types(team_df)
-                        st.dataframe(team_df, use_container_width=True)
+                        team_df = build_team_df(team_name)
+                        st.dataframe(team_df, use_container_width=True, hide_index=True,
+                                     height=min(35 * len(team_df) + 38, 300))
                         
                         # Team stats
-                        active_members = len([m for m in team_info['members'] if m['status'] == 'Active'])
+                        active_members = int(composition.at[team_name, "Active Members"])
                         col1, col2, col3 = st.columns(3)
                         
                         with col1:
-                            st.metric("👥 Total Members", len(team_info['members']))
+                            st.metric("👥 Total Members", int(composition.at[team_name, "Total Members"]))
                         with col2:
                             st.metric("✅ Active", active_members)
                         with col3:
@@ -1286,19 +1826,7 @@ else:
                 # Team performance chart
                 st.subheader("📈 Team Performance Overview")
                 
-                team_data = []
-                for team_name, team_info in TEAM_STRUCTURE.items():
-                    active_count = len([m for m in team_info['members'] if m['status'] == 'Active'])
-                    team_data.append({
-                        "Team": team_name,
-                        "Active Members": active_count,
-                        "Total Members": len(team_info['members'])
-                    })
-                
-                team_df = pd.DataFrame(team_data)
-                fig = px.bar(team_df, x="Team", y=["Active Members", "Total Members"],
-                            title="Team Composition", barmode="group")
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(team_composition_figure(), use_container_width=True)
             
             # --- SUPER CHAT TAB ---
             with tab7:
@@ -1306,9 +1834,9 @@ else:
                 
                 st.markdown(f"""
                 <div class="chat-container">
-                    <h3>🤖 AI Assistant for {st.session_state.user_info['name']}</h3>
+                    <h3>🤖 AI Assistant for {current_user['name']}</h3>
                     <p>Chat with our AI assistant powered by Lil J’s Ai Auto Laundry automation</p>
-                    <p><strong>User Context:</strong> {st.session_state.user_info['role']} in {st.session_state.user_info['team']}</p>
+                    <p><strong>User Context:</strong> {current_user['role']} in {current_user['team']}</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
@@ -1331,18 +1859,19 @@ else:
                     if N8N_WEBHOOK_URL:
                         try:
                             with st.spinner("🤖 LILJ AI is thinking..."):
-                                response = requests.post(
+                                response = http_session().post(
                                     N8N_WEBHOOK_URL,
-                                    json={
+                                    headers={"Content-Type": "application/json"},
+                                    data=dump_json({
                                         "message": prompt,
                                         "user_id": st.session_state.username,
-                                        "user_name": st.session_state.user_info['name'],
-                                        "user_role": st.session_state.user_info['role'],
-                                        "user_team": st.session_state.user_info['team'],
+                                        "user_name": current_user['name'],
+                                        "user_role": current_user['role'],
+                                        "user_team": current_user['team'],
                                         "timestamp": datetime.now().isoformat(),
                                         "customer_count": len(customers_df),
                                         "system": "laundry_crm"
-                                    },
+                                    }),
                                     timeout=30
                                 )
                                 
@@ -1358,7 +1887,7 @@ else:
                         except Exception as e:
                             bot_response = f"Connection error: {str(e)}"
                     else:
-                        bot_response = f"Hello {st.session_state.user_info['name']}! AI chat is ready with your user context."
+                        bot_response = f"Hello {current_user['name']}! AI chat is ready with your user context."
                     
                     st.session_state.messages.append({"role": "assistant", "content": bot_response})
                     with st.chat_message("assistant"):
@@ -1369,15 +1898,7 @@ else:
                 st.subheader("🤖 Lil J’s Ai Auto Laundry AI Phone System")
                 
                 # Audio fix notification
-                st.markdown("""
-                <div class="audio-fixed-card">
-                    <h3>🔧 Audio Issues Fixed!</h3>
-                    <p>✅ ALSA audio errors suppressed</p>
-                    <p>✅ Rust panic errors handled</p>
-                    <p>✅ Streamlit Cloud compatible</p>
-                    <p>✅ Server-side calling enabled</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(AUDIO_FIXED_CARD_HTML, unsafe_allow_html=True)
                 
                 # Initialize AI phone system
                 try:
@@ -1386,9 +1907,9 @@ else:
                         st.success("✅ AI Phone System API Key loaded from secrets")
                         
                         # Initialize AI phone system if not exists
-                        if not st.session_state.ai_phone_system:
-                            st.session_state.ai_phone_system = AudioFixedAIPhoneSystem(api_key)
-                            success, msg = st.session_state.ai_phone_system.initialize_system()
+                        if not phone_system:
+                            phone_system = st.session_state.ai_phone_system = AudioFixedAIPhoneSystem(api_key)
+                            success, msg = phone_system.initialize_system()
                             if success:
                                 st.success(f"✅ {msg}")
                                 st.session_state.ai_system_initialized = True
@@ -1403,45 +1924,19 @@ else:
                     st.error(f"❌ Error initializing AI phone system: {str(e)}")
                     api_key = None
                 
-                if api_key and st.session_state.ai_phone_system:
-                    # System status overview
-                    status = st.session_state.ai_phone_system.get_system_status()
+                if api_key and phone_system:
+                    # System status overview (the system may have been created in this tab just now)
+                    status = ai_status or phone_system.get_system_status()
                     
                     # Status cards
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.markdown(f'''
-                        <div class="ai-system-card">
-                            <h4>🤖 Active Calls</h4>
-                            <h2>{status['active_calls']}</h2>
-                        </div>
-                        ''', unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown(f'''
-                        <div class="ai-system-card">
-                            <h4>📊 Success Rate</h4>
-                            <h2>{status['system_health']['success_rate']:.1f}%</h2>
-                        </div>
-                        ''', unsafe_allow_html=True)
-                    
-                    with col3:
-                        st.markdown(f'''
-                        <div class="ai-system-card">
-                            <h4>📈 Total Calls</h4>
-                            <h2>{status['analytics']['total_calls']}</h2>
-                        </div>
-                        ''', unsafe_allow_html=True)
-                    
-                    with col4:
-                        health_color = {"healthy": "#4CAF50", "warning": "#FF9800", "critical": "#f44336"}.get(status['system_health']['status'], "#666")
-                        st.markdown(f'''
-                        <div class="ai-system-card" style="background: linear-gradient(135deg, {health_color} 0%, {health_color}CC 100%);">
-                            <h4>🏥 System Health</h4>
-                            <h2>{status['system_health']['status'].upper()}</h2>
-                        </div>
-                        ''', unsafe_allow_html=True)
+                    health = status['system_health']
+                    st.markdown(system_row_html([
+                        ("🤖 Active Calls", status['active_calls'], ""),
+                        ("📊 Success Rate", f"{health['success_rate']:.1f}%", ""),
+                        ("📈 Total Calls", status['analytics']['total_calls'], ""),
+                        ("🏥 System Health", health['status'].upper(),
+                         HEALTH_CARD_STYLE.format(color=HEALTH_COLORS.get(health['status'], "#666")))
+                    ]), unsafe_allow_html=True)
                     
                     # Real Assistant ID Display
                     st.markdown(f"""
@@ -1464,34 +1959,23 @@ else:
                         st.subheader("🤖 AI Assistant Selection")
                         
                         # Display available assistants
-                        assistant_cols = st.columns(2)
-                        for idx, (assistant_type, config) in enumerate(AI_ASSISTANTS.items()):
-                            with assistant_cols[idx % 2]:
-                                availability = status['assistant_availability'].get(assistant_type, 'unknown')
-                                availability_color = {"available": "🟢", "unavailable": "🔴", "unknown": "🟡"}.get(availability, "🟡")
-                                
-                                if st.button(f"{availability_color} {config['name']}", key=f"select_{assistant_type}", use_container_width=True):
-                                    st.session_state.selected_assistant_type = assistant_type
-                                
-                                if st.session_state.selected_assistant_type == assistant_type:
-                                    st.markdown(f"""
-                                    <div class="assistant-card">
-                                        <h4>✅ Selected: {config['name']}</h4>
-                                        <p><strong>ID:</strong> <code>{config['id'][:8]}...</code></p>
-                                        <p><strong>Category:</strong> {config['category']}</p>
-                                        <p><strong>Context:</strong> {config['context']}</p>
-                                        <p><strong>Languages:</strong> {', '.join(config['languages'])}</p>
-                                        <p><strong>Availability:</strong> {config['availability']}</p>
-                                        <p><strong>Skills:</strong> {', '.join(config['skills'])}</p>
-                                        <p>{config['description']}</p>
-                                    </div>
-                                    """, unsafe_allow_html=True)
+                        availability = status['assistant_availability']
+                        st.selectbox(
+                            "Assistant",
+                            ASSISTANT_TYPES,
+                            key="selected_assistant_type",
+                            format_func=lambda assistant_type: (
+                                f"{AVAILABILITY_ICONS.get(availability.get(assistant_type, 'unknown'), '🟡')} "
+                                f"{AI_ASSISTANTS[assistant_type]['name']}"
+                            )
+                        )
+                        st.markdown(selected_assistant_card(st.session_state.selected_assistant_type), unsafe_allow_html=True)
                     
                     with col2:
                         st.subheader("⚙️ Call Configuration")
                         
                         # Call type selection
-                        call_type = st.radio("📞 Call Type", ["Outbound Call", "Server Call Link", "API Call"])
+                        call_type = st.radio("📞 Call Type", CALL_TYPE_OPTIONS)
                         
                         # Phone number input (only for outbound calls)
                         phone_number = ""
@@ -1505,7 +1989,7 @@ else:
                         # Advanced options
                         with st.expander("🔧 Advanced Options"):
                             enable_recording = st.checkbox("🎙️ Enable Call Recording", value=False)
-                            priority_level = st.selectbox("📊 Priority Level", ["Normal", "High", "Emergency"])
+                            priority_level = st.selectbox("📊 Priority Level", PRIORITY_LEVELS)
                     
                     # Call controls
                     st.markdown("---")
@@ -1526,12 +2010,12 @@ else:
                                     context['priority'] = priority_level.lower()
                                     
                                     user_info = {
-                                        'name': st.session_state.user_info['name'],
-                                        'role': st.session_state.user_info['role'],
-                                        'team': st.session_state.user_info['team']
+                                        'name': current_user['name'],
+                                        'role': current_user['role'],
+                                        'team': current_user['team']
                                     }
                                     
-                                    success, message = st.session_state.ai_phone_system.start_outbound_call(
+                                    success, message = phone_system.start_outbound_call(
                                         phone_number=phone_number,
                                         assistant_type=st.session_state.selected_assistant_type,
                                         context=context,
@@ -1539,9 +2023,8 @@ else:
                                     )
                                     
                                     if success:
-                                        st.success(f"📞 {message}")
+                                        st.toast(f"📞 {message}")
                                         st.balloons()
-                                        time.sleep(2)
                                         st.rerun()
                                     else:
                                         st.error(f"❌ {message}")
@@ -1560,12 +2043,12 @@ else:
                                     context['priority'] = priority_level.lower()
                                     
                                     user_info = {
-                                        'name': st.session_state.user_info['name'],
-                                        'role': st.session_state.user_info['role'],
-                                        'team': st.session_state.user_info['team']
+                                        'name': current_user['name'],
+                                        'role': current_user['role'],
+                                        'team': current_user['team']
                                     }
                                     
-                                    success, message, call_link = st.session_state.ai_phone_system.create_server_call_link(
+                                    success, message, call_link = phone_system.create_server_call_link(
                                         assistant_type=st.session_state.selected_assistant_type,
                                         context=context,
                                         user_info=user_info
@@ -1592,21 +2075,20 @@ else:
                                     context['priority'] = priority_level.lower()
                                     
                                     user_info = {
-                                        'name': st.session_state.user_info['name'],
-                                        'role': st.session_state.user_info['role'],
-                                        'team': st.session_state.user_info['team']
+                                        'name': current_user['name'],
+                                        'role': current_user['role'],
+                                        'team': current_user['team']
                                     }
                                     
-                                    success, message = st.session_state.ai_phone_system.start_api_call(
+                                    success, message = phone_system.start_api_call(
                                         assistant_type=st.session_state.selected_assistant_type,
                                         context=context,
                                         user_info=user_info
                                     )
                                     
                                     if success:
-                                        st.success(f"🔌 {message}")
+                                        st.toast(f"🔌 {message}")
                                         st.balloons()
-                                        time.sleep(2)
                                         st.rerun()
                                     else:
                                         st.error(f"❌ {message}")
@@ -1615,10 +2097,9 @@ else:
                     
                     with col2:
                         if st.button("⛔ Stop All Calls", use_container_width=True, disabled=status['active_calls'] == 0):
-                            success, message = st.session_state.ai_phone_system.stop_call()
+                            success, message = phone_system.stop_call()
                             if success:
-                                st.success(f"📴 {message}")
-                                time.sleep(1)
+                                st.toast(f"📴 {message}")
                                 st.rerun()
                             else:
                                 st.error(f"❌ {message}")
@@ -1632,24 +2113,9 @@ else:
                             with suppress_audio_errors():
                                 st.success("✅ Audio error suppression working!")
                     
-                    # Live call monitoring
-                    if status['active_calls'] > 0:
-                        st.markdown("---")
-                        st.subheader("📊 Live Call Monitoring")
-                        
-                        for call in status['active_call_details']:
-                            call_type_icon = {"outbound": "📞", "api_call": "🔌", "server_link": "🔗"}.get(call['call_type'], "🤖")
-                            st.markdown(f"""
-                            <div class="call-active">
-                                <h4>{call_type_icon} Active Call: {call['call_id'][:8]}...</h4>
-                                <p><strong>Type:</strong> {call['call_type'].replace('_', ' ').title()}</p>
-                                <p><strong>Assistant:</strong> {call['assistant_name']}</p>
-                                <p><strong>Duration:</strong> {(datetime.now() - call['start_time']).total_seconds():.0f} seconds</p>
-                                <p><strong>Real Assistant ID:</strong> <code>{REAL_ASSISTANT_ID[:8]}...</code></p>
-                                {f"<p><strong>Phone:</strong> {call.get('phone_number', 'N/A')}</p>" if call['call_type'] == 'outbound' else ""}
-                                <p><strong>Audio Status:</strong> Errors Suppressed ✅</p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                    # Live call monitoring; only polls while there are calls to watch
+                    if status['active_calls']:
+                        live_call_monitor(phone_system)
                     
                     # System tabs for detailed information
                     system_tab1, system_tab2, system_tab3 = st.tabs([
@@ -1659,28 +2125,22 @@ else:
                     with system_tab1:
                         st.subheader("📞 Recent Call History")
                         if status['call_history']:
-                            for call in reversed(status['call_history'][-10:]):  # Last 10 calls
-                                col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
-                                
-                                with col1:
-                                    call_type_icon = {"outbound": "📞", "api_call": "🔌", "server_link": "🔗"}.get(call['call_type'], "🤖")
-                                    st.write(f"**{call_type_icon} {call['start_time'].strftime('%H:%M:%S')}**")
-                                    st.caption(call.get('phone_number', call['call_type'].replace('_', ' ').title()))
-                                
-                                with col2:
-                                    st.write(f"**{call['assistant_name']}**")
-                                    st.caption(f"Context: {call.get('context', {}).get('call_context', 'N/A')[:30]}...")
-                                
-                                with col3:
-                                    status_emoji = {"active": "🟡", "completed": "✅", "stopped": "⛔", "failed": "❌", "api_active": "🔌", "link_created": "🔗"}.get(call['status'], "❓")
-                                    st.write(f"**{status_emoji} {call['status'].upper()}**")
-                                    if 'duration' in call:
-                                        st.caption(f"Duration: {call['duration']:.0f}s")
-                                
-                                with col4:
-                                    st.caption(f"ID: {call['call_id'][:8]}...")
-                                
-                                st.markdown("---")
+                            history_rows = (
+                                (
+                                    f"{CALL_TYPE_ICONS.get(call['call_type'], '🤖')} {call['start_time'].strftime('%H:%M:%S')}",
+                                    call.get('phone_number', CALL_TYPE_LABELS[call['call_type']]),
+                                    call['assistant_name'],
+                                    call.get('context', {}).get('call_context', 'N/A')[:30],
+                                    f"{CALL_STATUS_ICONS.get(call['status'], '❓')} {call['status'].upper()}",
+                                    round(call['duration']) if 'duration' in call else None,
+                                    call['call_id'][:8]
+                                )
+                                for call in islice(reversed(status['call_history']), 10)  # Last 10 calls
+                            )
+                            history_df = pd.DataFrame.from_records(history_rows, columns=CALL_HISTORY_COLUMNS)
+                            # Active calls have no duration; a nullable int keeps whole seconds, not 12.0/NaN
+                            history_df["Duration (s)"] = history_df["Duration (s)"].astype("Int64")
+                            st.dataframe(history_df, use_container_width=True, hide_index=True)
                         else:
                             st.info("No call history available yet.")
                     
@@ -1696,211 +2156,95 @@ else:
                             server_calls = status['analytics']['server_calls']
                             
                             if outbound_calls > 0 or server_calls > 0:
-                                fig = px.pie(
-                                    values=[outbound_calls, server_calls],
-                                    names=['Outbound Calls', 'Server Calls'],
-                                    title="Call Type Distribution"
-                                )
-                                st.plotly_chart(fig, use_container_width=True)
+                                st.plotly_chart(call_type_figure(outbound_calls, server_calls), use_container_width=True)
                         
                         with col2:
                             # Assistant usage chart
                             if status['analytics']['assistant_usage']:
-                                fig = px.bar(
-                                    x=list(status['analytics']['assistant_usage'].keys()),
-                                    y=list(status['analytics']['assistant_usage'].values()),
-                                    title="Assistant Usage Statistics"
-                                )
-                                st.plotly_chart(fig, use_container_width=True)
+                                st.markdown("**Assistant Usage Statistics**")
+                                st.bar_chart(pd.Series(status['analytics']['assistant_usage'], name="Usage Count"))
                         
-                        # Key metrics
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            st.metric("Total Calls", status['analytics']['total_calls'])
-                        with col2:
-                            st.metric("Outbound Calls", status['analytics']['outbound_calls'])
-                        with col3:
-                            st.metric("Server Calls", status['analytics']['server_calls'])
-                        with col4:
-                            st.metric("Success Rate", f"{status['system_health']['success_rate']:.1f}%")
+                        # Key metrics (total calls and success rate are on the status cards above)
+                        st.markdown(metric_row_html([
+                            ("Outbound Calls", status['analytics']['outbound_calls']),
+                            ("Server Calls", status['analytics']['server_calls'])
+                        ]), unsafe_allow_html=True)
                     
                     with system_tab3:
                         st.subheader("📝 System Logs")
                         
                         # Log level filter
-                        log_level = st.selectbox("Filter by Level", ["All", "INFO", "ERROR", "WARNING"])
+                        log_level = st.selectbox("Filter by Level", LOG_LEVEL_FILTERS)
                         
                         # Display logs
-                        logs_to_show = status['call_logs']
-                        if log_level != "All":
-                            logs_to_show = [log for log in logs_to_show if log_level in log]
+                        logs_to_show = phone_system.recent_logs(None if log_level == "All" else log_level)
                         
-                        for log in reversed(logs_to_show[-50:]):  # Last 50 logs
-                            if "ERROR" in log:
-                                st.error(log)
-                            elif "WARNING" in log:
-                                st.warning(log)
-                            else:
-                                st.info(log)
+                        if logs_to_show:
+                            # Newest 50 entries, one block instead of one alert per line
+                            st.code("\n".join(logs_to_show), language=None)
                         
                         if st.button("🧹 Clear Logs"):
-                            st.session_state.ai_phone_system.call_logs = []
-                            st.success("Logs cleared!")
+                            phone_system.clear_logs()
+                            st.toast("Logs cleared!", icon="🧹")
                             st.rerun()
-                    
-                    # Auto-refresh for active calls
-                    if status['active_calls'] > 0:
-                        time.sleep(3)
-                        st.rerun()
                 
                 else:
                     # System not initialized
-                    st.markdown(f"""
-                    <div style="text-align: center; padding: 3rem; background: linear-gradient(135deg, #FF6B6B 0%, #FF8E53 100%); border-radius: 15px; color: white; margin: 2rem 0;">
-                        <h2>🤖 Lil J’s Ai Auto Laundry</h2>
-                        <p>Advanced AI-powered calling system with audio error fixes</p>
-                        
-                        <div style="background: rgba(255,255,255,0.1); padding: 1.5rem; border-radius: 10px; margin: 1.5rem 0;">
-                            <h3>🔧 Audio Fixes Applied</h3>
-                            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-top: 1rem;">
-                                <div>
-                                    <p>✅ ALSA Errors Suppressed</p>
-                                    <p>✅ Rust Panic Handled</p>
-                                    <p>✅ Audio Context Fixed</p>
-                                    <p>✅ Streamlit Cloud Compatible</p>
-                                </div>
-                                <div>
-                                    <p>📞 Outbound Calls</p>
-                                    <p>🔗 Server Call Links</p>
-                                    <p>🔌 API Calls</p>
-                                    <p>📊 Real-time Monitoring</p>
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px; margin: 1rem 0;">
-                            <h4>🎯 Real Assistant Configuration</h4>
-                            <p><strong>Assistant ID:</strong> <code>{REAL_ASSISTANT_ID}</code></p>
-                            <p>All AI assistants use this single real ID with different contexts</p>
-                            <p><strong>Audio Status:</strong> Errors Suppressed for Streamlit Cloud</p>
-                        </div>
-                        
-                        <p>Please configure your API key in Streamlit secrets to activate the system.</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(SYSTEM_OFFLINE_HTML, unsafe_allow_html=True)
             
             # --- ANALYTICS TAB ---
             with tab9:
                 st.subheader("📊 Advanced Analytics")
                 
                 # Analytics overview
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>👥 Total Users</h3>
-                        <h2>{len(DEMO_ACCOUNTS)}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                
-                with col2:
-                    total_team_members = sum(len(team["members"]) for team in TEAM_STRUCTURE.values())
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>👨‍💼 Team Members</h3>
-                        <h2>{total_team_members}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                
-                with col3:
-                    total_ai_calls = 0
-                    if st.session_state.ai_phone_system:
-                        status = st.session_state.ai_phone_system.get_system_status()
-                        total_ai_calls = status['analytics']['total_calls']
-                    
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>🤖 AI Calls</h3>
-                        <h2>{total_ai_calls}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                
-                with col4:
-                    avg_price = price_list_df["Price (USD)"].mean() if not price_list_df.empty else 0
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <h3>💰 Avg Price</h3>
-                        <h2>${avg_price:.2f}</h2>
-                    </div>
-                    ''', unsafe_allow_html=True)
+                avg_price = price_list_df["Price (USD)"].mean() if not price_list_df.empty else 0
+                st.markdown(metric_row_html([
+                    ("👥 Total Users", DEMO_ACCOUNT_COUNT),
+                    ("👨‍💼 Team Members", TEAM_MEMBER_COUNT),
+                    ("🤖 AI Calls", ai_status['analytics']['total_calls'] if ai_status else 0),
+                    ("💰 Avg Price", f"${avg_price:.2f}")
+                ]), unsafe_allow_html=True)
                 
                 # Audio-fixed AI phone system analytics
-                if st.session_state.ai_phone_system:
+                if ai_status:
                     st.subheader("🤖 Lil J’s Ai Auto Laundry System Analytics")
-                    status = st.session_state.ai_phone_system.get_system_status()
+                    status = ai_status
                     
                     col1, col2 = st.columns(2)
                     
                     with col1:
                         # System health over time (mock data for demonstration)
-                        health_data = {
-                            'Time': [f"{i}:00" for i in range(9, 18)],
-                            'Success Rate': [95, 97, 94, 96, 98, 92, 95, 97, 96],
-                            'Active Calls': [2, 5, 8, 12, 15, 18, 14, 10, 6]
-                        }
-                        
-                        fig = make_subplots(specs=[[{"secondary_y": True}]])
-                        fig.add_trace(
-                            go.Scatter(x=health_data['Time'], y=health_data['Success Rate'], name="Success Rate %"),
-                            secondary_y=False,
-                        )
-                        fig.add_trace(
-                            go.Scatter(x=health_data['Time'], y=health_data['Active Calls'], name="Active Calls"),
-                            secondary_y=True,
-                        )
-                        fig.update_xaxes(title_text="Time")
-                        fig.update_yaxes(title_text="Success Rate (%)", secondary_y=False)
-                        fig.update_yaxes(title_text="Active Calls", secondary_y=True)
-                        fig.update_layout(title_text="Audio-Fixed AI System Performance")
-                        
-                        st.plotly_chart(fig, use_container_width=True)
+                        st.plotly_chart(system_performance_figure(), use_container_width=True)
                     
                     with col2:
                         # Assistant performance comparison
-                        assistant_performance = []
-                        for assistant_type, config in AI_ASSISTANTS.items():
-                            usage_count = status['analytics']['assistant_usage'].get(assistant_type, 0)
-                            assistant_performance.append({
-                                'Assistant': config['name'],
-                                'Usage Count': usage_count,
-                                'Priority': config['priority'],
-                                'Category': config['category']
-                            })
+                        assistant_usage = status['analytics']['assistant_usage']
+                        assistant_names = [config['name'] for config in AI_ASSISTANTS.values()]
+                        usage_counts = [assistant_usage.get(assistant_type, 0) for assistant_type in AI_ASSISTANTS]
+                        categories = [config['category'] for config in AI_ASSISTANTS.values()]
                         
-                        if assistant_performance:
-                            perf_df = pd.DataFrame(assistant_performance)
-                            fig = px.bar(perf_df, x='Assistant', y='Usage Count', 
-                                        color='Category', title="Assistant Usage Statistics")
+                        if assistant_names:
+                            fig = px.bar(x=assistant_names, y=usage_counts, color=categories,
+                                        labels={'x': 'Assistant', 'y': 'Usage Count', 'color': 'Category'},
+                                        title="Assistant Usage Statistics")
                             fig.update_xaxes(tickangle=45)
                             st.plotly_chart(fig, use_container_width=True)
                 
                 # User activity analytics
                 st.subheader("👤 User Activity")
-                st.markdown(f"**Current Session:** {st.session_state.user_info['name']} ({st.session_state.user_info['role']})")
+                st.markdown(f"**Current Session:** {current_user['name']} ({current_user['role']})")
                 
                 # Team performance analytics
                 st.subheader("📈 Team Performance")
                 
-                team_performance_data = []
-                for team_name, team_info in TEAM_STRUCTURE.items():
-                    active_members = len([m for m in team_info['members'] if m['status'] == 'Active'])
-                    team_performance_data.append({
+                team_performance_data = [
+                    {
                         "Team": team_name,
-                        "Active Members": active_members,
-                        "Performance Score": active_members * 85  # Mock performance score
-                    })
+                        "Active Members": int(active_members),
+                        "Performance Score": int(active_members) * 85  # Mock performance score
+                    }
+                    for team_name, active_members in team_composition()["Active Members"].items()
+                ]
                 
                 team_perf_df = pd.DataFrame(team_performance_data)
                 fig = px.bar(team_perf_df, x="Team", y="Performance Score",
@@ -1909,116 +2253,17 @@ else:
                 
                 # Export all data
                 st.subheader("📥 Data Export")
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    if st.button("📥 Export All Data"):
-                        # Create comprehensive export
-                        export_data = {
-                            "customers": customers_df.to_dict('records') if not customers_df.empty else [],
-                            "invoices": invoices_df.to_dict('records') if not invoices_df.empty else [],
-                            "price_list": price_list_df.to_dict('records') if not price_list_df.empty else [],
-                            "teams": TEAM_STRUCTURE,
-                            "ai_assistants": AI_ASSISTANTS,
-                            "real_assistant_id": REAL_ASSISTANT_ID,
-                            "ai_phone_system_status": st.session_state.ai_phone_system.get_system_status() if st.session_state.ai_phone_system else {},
-                            "audio_fixes_applied": True,
-                            "exported_by": st.session_state.user_info['name'],
-                            "export_time": datetime.now().isoformat()
-                        }
-                        
-                        st.download_button(
-                            label="Download Complete Data Export (JSON)",
-                            data=json.dumps(export_data, indent=2, default=str),
-                            file_name=f"crm_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                            mime="application/json"
-                        )
-                
-                with col2:
-                    if st.button("📊 Export Analytics Report"):
-                        ai_analytics = {}
-                        if st.session_state.ai_phone_system:
-                            status = st.session_state.ai_phone_system.get_system_status()
-                            ai_analytics = status['analytics']
-                        
-                        report_data = {
-                            "report_generated_by": st.session_state.user_info['name'],
-                            "report_date": datetime.now().isoformat(),
-                            "total_customers": len(customers_df),
-                            "total_invoices": len(invoices_df),
-                            "total_team_members": total_team_members,
-                            "ai_phone_system_analytics": ai_analytics,
-                            "team_breakdown": team_performance_data,
-                            "assistant_configuration": AI_ASSISTANTS,
-                            "real_assistant_id": REAL_ASSISTANT_ID,
-                            "audio_fixes_applied": True
-                        }
-                        
-                        st.download_button(
-                            label="Download Analytics Report (JSON)",
-                            data=json.dumps(report_data, indent=2, default=str),
-                            file_name=f"analytics_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                            mime="application/json"
-                        )
                 
-                with col3:
-                    if st.button("🤖 Export AI System Data"):
-                        ai_data = {
-                            "ai_assistants": AI_ASSISTANTS,
-                            "real_assistant_id": REAL_ASSISTANT_ID,
-                            "system_status": st.session_state.ai_phone_system.get_system_status() if st.session_state.ai_phone_system else {},
-                            "audio_fixes_applied": True,
-                            "audio_error_suppression": "enabled",
-                            "exported_by": st.session_state.user_info['name'],
-                            "export_time": datetime.now().isoformat()
-                        }
-                        
-                        st.download_button(
-                            label="Download AI System Data (JSON)",
-                            data=json.dumps(ai_data, indent=2, default=str),
-                            file_name=f"ai_system_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                            mime="application/json"
-                        )
+                data_export_panel(current_user, customers_df, invoices_df, price_list_df,
+                                  ai_status, team_performance_data, phone_system)
         
         except Exception as e:
             st.error(f"❌ Error loading system: {e}")
     
     else:
         # No auth file uploaded - show system ready message
-        st.markdown(f"""
-        <div style="text-align: center; padding: 3rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white; margin: 2rem 0;">
-            <h2>🔐 System Ready - Upload Authentication</h2>
-            <p>Welcome {st.session_state.user_info['name']}! Upload your Google Service Account JSON file to access all features.</p>
-            
-            <div style="background: rgba(255,255,255,0.1); padding: 1.5rem; border-radius: 10px; margin: 1.5rem 0;">
-                <h3>✨ Your Access Level: {st.session_state.user_info['role']}</h3>
-                <p>Team: {st.session_state.user_info['team']}</p>
-                
-                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-top: 1rem;">
-                    <div>
-                        <p>✅ Customer Management</p>
-                        <p>🧾 Invoice System</p>
-                        <p>💰 Live Price List</p>
-                        <p>📊 Analytics Dashboard</p>
-                    </div>
-                    <div>
-                        <p>👥 Team Management ({sum(len(team["members"]) for team in TEAM_STRUCTURE.values())} members)</p>
-                        <p>🤖 Audio-Fixed AI Phone System</p>
-                        <p>💬 Advanced AI Chat System</p>
-                        <p>📥 Comprehensive Data Export</p>
-                    </div>
-                </div>
-            </div>
-            
-            <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px; margin: 1rem 0;">
-                <h4>🔧 Lil J’s Ai Auto Laundry Phone System</h4>
-                <p><strong>Real Assistant ID:</strong> <code>{REAL_ASSISTANT_ID}</code></p>
-                <p>✅ ALSA Audio Errors Suppressed</p>
-                <p>✅ Rust Panic Errors Handled</p>
-                <p>✅ Streamlit Cloud Compatible</p>
-                <p>📞 Outbound Calls | 🔗 Server Call Links | 🔌 API Calls</p>
-                <p>🎯 6 Specialized AI Assistants (All use same real ID)</p>
-                <p>📊 Real-time Analytics & Performance Monitoring</p>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(auth_banner_html(
+            current_user['name'],
+            current_user['role'],
+            current_user['team']
+        ), unsafe_allow_html=True)